@@ -23,14 +23,41 @@ Usage:
     }
 """
 
+import binascii
 import math
 
+try:
+    import numpy as np
+except ImportError:  # MicroPython builds ship without numpy
+    np = None
+
 
 # Simulated ML model weights (in production, load from trained model)
 # Features: [bm25_score, ctr, recency_days, has_image, price_range]
 MODEL_WEIGHTS = [0.4, 0.3, 0.15, 0.10, 0.05]
 MODEL_BIAS = 0.5
 
+# float32 copies for the vectorized path, converted once at import so
+# scoring never promotes the feature matrix to float64
+if np is not None:
+    import threading
+
+    _WEIGHTS = np.array(MODEL_WEIGHTS, dtype=np.float32)
+    _BIAS = np.float32(MODEL_BIAS)
+
+    # Per-thread feature/score buffers reused across calls
+    _buffers = threading.local()
+
+# Reference time for the recency feature (2024-01-28 in epoch seconds)
+NOW_TIMESTAMP = 1706400000
+
+# Names of the feature columns, in MODEL_WEIGHTS order
+FEATURE_NAMES = ["bm25", "ctr", "recency", "has_image", "price_score"]
+
+# Shared read-only stand-in for hits without a _source; avoids building a
+# new empty dict per hit
+_EMPTY_SOURCE = {}
+
 
 def normalize_score(value, min_val, max_val):
     """
@@ -50,6 +77,49 @@ def normalize_score(value, min_val, max_val):
     return (value - min_val) / (max_val - min_val)
 
 
+def simulated_ctr(doc_id):
+    """
+    Simulate a click-through rate for a document.
+
+    Uses CRC32 rather than the built-in hash(), which is salted per
+    process and would give a different CTR on every worker.
+
+    Args:
+        doc_id: Document ID
+
+    Returns:
+        Simulated CTR in [0, 1)
+    """
+    return binascii.crc32(doc_id.encode("utf-8")) % 100 / 100.0
+
+
+def recency_score(published_timestamp):
+    """
+    Score how recently a document was published.
+
+    Args:
+        published_timestamp: Publication time in epoch seconds
+
+    Returns:
+        Recency score, 1.0 for recent documents decaying towards 0.0
+    """
+    days_old = (NOW_TIMESTAMP - published_timestamp) / 86400.0
+    return 1.0 / (1.0 + math.log(max(days_old, 1)))
+
+
+def price_score(price):
+    """
+    Score a price (cheaper = better in this example).
+
+    Args:
+        price: Item price
+
+    Returns:
+        Price score, 1.0 for cheap items decaying towards 0.0
+    """
+    return 1.0 / (1.0 + math.log(max(price, 1)))
+
+
 def extract_features(hit, query_context):
     """
     Extract features from a search hit for ML model.
@@ -72,25 +142,73 @@ def extract_features(hit, query_context):
     # Feature 2: Click-through rate (from analytics)
     # In production, look up from analytics database
     doc_id = hit.get("_id", "")
-    ctr = hash(doc_id) % 100 / 100.0  # Simulated CTR [0, 1]
+    ctr = simulated_ctr(doc_id)
 
     # Feature 3: Recency (days since publication)
-    source = hit.get("_source", {})
-    published_timestamp = source.get("published_at", 0)
-    now_timestamp = 1706400000  # Example: 2024-01-28 in epoch seconds
-    days_old = (now_timestamp - published_timestamp) / 86400.0
-    # Normalize: recent = 1.0, old = 0.0
-    recency_score = 1.0 / (1.0 + math.log(max(days_old, 1)))
+    source = hit.get("_source", _EMPTY_SOURCE)
+    recency = recency_score(source.get("published_at", 0))
 
     # Feature 4: Has image (binary)
     has_image = 1.0 if source.get("image_url") else 0.0
 
     # Feature 5: Price range (if applicable)
-    price = source.get("price", 0.0)
-    # Normalize price to preference (cheaper = better in this example)
-    price_score = 1.0 / (1.0 + math.log(max(price, 1)))
+    price = price_score(source.get("price", 0.0))
+
+    return [bm25_score, ctr, recency, has_image, price]
+
+
+def extract_feature_matrix(hits, query_context, out=None):
+    """
+    Extract features for all hits into an (N, 5) float32 matrix.
+
+    Requires numpy. Columns follow FEATURE_NAMES. Raw values are gathered
+    in a single pass over the hits, then each feature is computed over its
+    whole column at once.
+
+    Args:
+        hits: List of search result hits
+        query_context: Query metadata (e.g., user preferences)
+        out: Optional float32 array of shape (len(hits), 5) to fill
+
+    Returns:
+        numpy.ndarray of shape (len(hits), 5)
+    """
+    n = len(hits)
+    bm25_scores = [0.0] * n
+    id_hashes = [0] * n
+    published = [0] * n
+    has_image = [0.0] * n
+    prices = [0.0] * n
+
+    for i, hit in enumerate(hits):
+        source = hit.get("_source", _EMPTY_SOURCE)
+        bm25_scores[i] = hit.get("score", 0.0)
+        # Same CRC32 as simulated_ctr
+        id_hashes[i] = binascii.crc32(hit.get("_id", "").encode("utf-8"))
+        published[i] = source.get("published_at", 0)
+        has_image[i] = 1.0 if source.get("image_url") else 0.0
+        prices[i] = source.get("price", 0.0)
 
-    return [bm25_score, ctr, recency_score, has_image, price_score]
+    features = out
+    if features is None:
+        features = np.empty((n, len(FEATURE_NAMES)), dtype=np.float32)
+    features[:, 0] = bm25_scores
+
+    id_hashes = np.array(id_hashes, dtype=np.uint32)
+    features[:, 1] = (id_hashes % 100).astype(np.float32) * np.float32(0.01)
+
+    # Recency and price normalizers run as one log over each column.
+    # Timestamps stay float64: float32 cannot hold epoch seconds exactly.
+    published = np.array(published, dtype=np.float64)
+    days_old = np.maximum((NOW_TIMESTAMP - published) / 86400.0, 1.0)
+    features[:, 2] = 1.0 / (1.0 + np.log(days_old))
+
+    features[:, 3] = has_image
+
+    prices = np.array(prices, dtype=np.float64)
+    features[:, 4] = 1.0 / (1.0 + np.log(np.maximum(prices, 1.0)))
+
+    return features
 
 
 def predict_score(features):
@@ -112,6 +230,100 @@ def predict_score(features):
     return score
 
 
+def _score_buffers(n):
+    """
+    Get this thread's feature matrix and score buffers, sized for n hits.
+
+    The buffers only grow, so steady-state batch sizes reuse the same
+    feature matrix and score array. extract_feature_matrix still builds
+    its per-column lists and intermediate arrays on every call. Views are
+    valid until the next call on the same thread.
+
+    Args:
+        n: Number of hits
+
+    Returns:
+        Tuple of (features, scores) views of shape (n, 5) and (n,)
+    """
+    features = getattr(_buffers, "features", None)
+    if features is None or features.shape[0] < n:
+        capacity = max(n, 1024)
+        features = np.empty((capacity, len(FEATURE_NAMES)), dtype=np.float32)
+        _buffers.features = features
+        _buffers.scores = np.empty(capacity, dtype=np.float32)
+
+    return features[:n], _buffers.scores[:n]
+
+
+def _score_hits(hits, query_context):
+    """
+    Score all hits with the ML model in one batch.
+
+    With numpy available, features are written into an (N, 5) float32
+    matrix and scored with a single matrix-vector product instead of a
+    Python dot product per hit.
+
+    Args:
+        hits: List of search result hits
+        query_context: Query metadata (e.g., user preferences)
+
+    Returns:
+        Tuple of (scores, features) indexed like hits; with numpy these
+        are views of per-thread buffers, overwritten by the next call, so
+        callers must copy anything they keep
+    """
+    if np is None:
+        features = [extract_features(hit, query_context) for hit in hits]
+        return [predict_score(f) for f in features], features
+
+    features, scores = _score_buffers(len(hits))
+    extract_feature_matrix(hits, query_context, out=features)
+
+    # float32 matrix times float32 vector dispatches to a single BLAS sgemv
+    # call for the whole page, written straight into the score buffer
+    np.matmul(features, _WEIGHTS, out=scores)
+    scores += _BIAS
+    return scores, features
+
+
+def rank_order(scores, k=None):
+    """
+    Compute hit indices ordered by descending score.
+
+    Ties keep their original relative order. When k is given, only the
+    top k indices are returned; if k is also small relative to the number
+    of hits, the top k are selected in linear time and only those are
+    sorted.
+
+    Args:
+        scores: Scores returned by _score_hits
+        k: Optional number of top hits to return
+
+    Returns:
+        Sequence of hit indices, best first
+    """
+    n = len(scores)
+    k = n if k is None else int(k)
+    truncate = 0 < k < n
+
+    if np is None:
+        # Index as tie-breaker: MicroPython's sort is not stable
+        order = sorted(range(n), key=lambda i: (-scores[i], i))
+        return order[:k] if truncate else order
+
+    if truncate and k < n // 4:
+        # Select around the k-th best score in linear time; ties at the
+        # cut-off are filled by position so the result stays stable
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        top = np.concatenate((above, ties))
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    order = np.argsort(-scores, kind="stable")
+    return order[:k] if truncate else order
+
+
 def udf_main(result):
     """
     Main UDF entry point.
@@ -130,7 +342,12 @@ def udf_main(result):
                         "_source": {...}
                     },
                     ...
-                ]
+                ],
+                "size": 10,  # optional: keep only the top hits
+                "query_context": {  # optional
+                    "debug": False,
+                    "emit_features": False
+                }
             }
 
     Returns:
@@ -142,43 +359,34 @@ def udf_main(result):
         return result
 
     # Extract query context (could come from request metadata)
-    query_context = {}
-
-    # Compute ML scores for each hit
-    scored_hits = []
-    for hit in hits:
-        # Extract features
-        features = extract_features(hit, query_context)
-
-        # Predict relevance score
-        ml_score = predict_score(features)
+    query_context = result.get("query_context") or {}
+    debug = query_context.get("debug", False)
 
-        # Store original BM25 score for reference
-        hit["_original_score"] = hit.get("score", 0.0)
+    # Compute ML scores for all hits
+    scores, features = _score_hits(hits, query_context)
 
-        # Update hit with ML score
-        hit["score"] = ml_score
+    # Sort by ML score (descending), keeping only the requested page size
+    order = rank_order(scores, result.get("size"))
+    ranked_hits = [hits[i] for i in order]
+    if np is None:
+        ranked_scores = [scores[i] for i in order]
+    else:
+        ranked_scores = scores[order].tolist()
 
-        # Add feature explanations (optional, for debugging)
-        hit["_ml_features"] = {
-            "bm25": features[0],
-            "ctr": features[1],
-            "recency": features[2],
-            "has_image": features[3],
-            "price_score": features[4]
-        }
+    # Original scores are debug-only, so the common path adds no keys to
+    # the hit dicts
+    if debug:
+        for hit in ranked_hits:
+            hit["_original_score"] = hit.get("score", 0.0)
 
-        scored_hits.append((ml_score, hit))
+    # Update hits with ML scores
+    for hit, score in zip(ranked_hits, ranked_scores):
+        hit["score"] = score
 
-    # Sort by ML score (descending)
-    scored_hits.sort(key=lambda x: x[0], reverse=True)
-
-    # Extract sorted hits
-    result["hits"] = [hit for score, hit in scored_hits]
+    result["hits"] = ranked_hits
 
     # Update max_score
-    if scored_hits:
-        result["max_score"] = scored_hits[0][0]
+    result["max_score"] = ranked_scores[0]
 
     # Add metadata about re-ranking
     if "_meta" not in result:
@@ -186,9 +394,20 @@ def udf_main(result):
     result["_meta"]["ml_ranking"] = {
         "model": "learning_to_rank_v1",
         "features": MODEL_WEIGHTS,
-        "reranked_count": len(hits)
+        "reranked_count": len(hits),
+        "scores": ranked_scores
     }
 
+    # Feature explanations go out once as a matrix rather than a dict per
+    # hit; rows follow result["hits"]
+    if debug or query_context.get("emit_features", False):
+        if np is None:
+            features_matrix = [features[i] for i in order]
+        else:
+            features_matrix = features[order].tolist()
+        result["_meta"]["ml_ranking"]["feature_names"] = FEATURE_NAMES
+        result["_meta"]["ml_ranking"]["features_matrix"] = features_matrix
+
     return result
 
 
@@ -203,10 +422,10 @@ def udf_main(result):
 # }
 # Output: {
 #     "total": 2,
-#     "max_score": 1.95,
+#     "max_score": 1.613,
 #     "hits": [
-#         {"score": 1.95, "_original_score": 2.0, "_id": "doc2", ...},
-#         {"score": 1.87, "_original_score": 2.5, "_id": "doc1", ...}
+#         {"score": 1.613, "_id": "doc1", ...},
+#         {"score": 1.432, "_id": "doc2", ...}
 #     ],
-#     "_meta": {"ml_ranking": {...}}
+#     "_meta": {"ml_ranking": {..., "scores": [1.613, 1.432]}}
 # }
@@ -55,10 +55,14 @@ def correct_word(word):
     Returns:
         Tuple of (corrected_word, was_corrected)
     """
-    word_lower = word.lower()
-
-    if word_lower in SPELLING_CORRECTIONS:
-        return SPELLING_CORRECTIONS[word_lower], True
+    # Most query words are already lowercase; look them up without copying
+    if word.islower():
+        corrected = SPELLING_CORRECTIONS.get(word)
+    else:
+        corrected = SPELLING_CORRECTIONS.get(word.lower())
+
+    if corrected is not None:
+        return corrected, True
 
     return word, False
 
@@ -33,6 +33,26 @@ SYNONYMS = {
     "good": ["great", "excellent", "quality"],
 }
 
+# query_string operators, never expanded even if listed in SYNONYMS
+QUERY_STRING_OPERATORS = frozenset(("AND", "OR", "NOT"))
+
+# Synonym part of each OR clause, built once at import so expanding a
+# term only has to prepend the term as the user wrote it. Terms with no
+# synonyms are left out and stay unexpanded.
+_EXPANSION_TAILS = {
+    term: " OR " + " OR ".join(synonyms) + ")"
+    for term, synonyms in SYNONYMS.items()
+    if synonyms
+}
+
+# Same table without operators, so the query_string branch needs no
+# per-term operator check
+_QUERY_STRING_TAILS = {
+    term: tail
+    for term, tail in _EXPANSION_TAILS.items()
+    if term.upper() not in QUERY_STRING_OPERATORS
+}
+
 
 def expand_term(term):
     """
@@ -42,16 +62,39 @@ def expand_term(term):
         term: Search term to expand
 
     Returns:
-        List of original term + synonyms
+        OR clause of original term + synonyms: (term1 OR term2 OR term3),
+        or the term unchanged if it has no synonyms
     """
-    term_lower = term.lower()
+    tail = _EXPANSION_TAILS.get(term.lower())
+    if tail is None:
+        return term
+
+    return "(" + term + tail
 
-    # Check if term has synonyms
-    if term_lower in SYNONYMS:
-        # Return original + synonyms
-        return [term] + SYNONYMS[term_lower]
 
-    return [term]
+def expand_text(text, skip_operators=False):
+    """
+    Expand every term with synonyms in a text string.
+
+    Args:
+        text: Query text to expand
+        skip_operators: Leave AND/OR/NOT untouched (for query_string)
+
+    Returns:
+        Text with each expandable term replaced by an OR clause:
+        (term1 OR term2 OR term3)
+    """
+    tails = _QUERY_STRING_TAILS if skip_operators else _EXPANSION_TAILS
+    expanded_terms = []
+
+    for term in text.split():
+        tail = tails.get(term.lower())
+        if tail is None:
+            expanded_terms.append(term)
+        else:
+            expanded_terms.append("(" + term + tail)
+
+    return " ".join(expanded_terms)
 
 
 def udf_main(request):
@@ -88,19 +131,7 @@ def udf_main(request):
                 continue
 
             # Expand terms
-            terms = original_text.split()
-            expanded_terms = []
-
-            for term in terms:
-                synonyms = expand_term(term)
-                if len(synonyms) > 1:
-                    # Create OR clause: (term1 OR term2 OR term3)
-                    expanded_terms.append("(" + " OR ".join(synonyms) + ")")
-                else:
-                    expanded_terms.append(term)
-
-            # Rebuild query
-            expanded_query = " ".join(expanded_terms)
+            expanded_query = expand_text(original_text)
 
             # Update request
             if isinstance(query["match"][field], str):
@@ -111,22 +142,9 @@ def udf_main(request):
     # Handle query_string query
     if "query_string" in query:
         query_text = query["query_string"].get("query", "")
-        terms = query_text.split()
-        expanded_terms = []
-
-        for term in terms:
-            # Skip operators
-            if term.upper() in ["AND", "OR", "NOT"]:
-                expanded_terms.append(term)
-                continue
-
-            synonyms = expand_term(term)
-            if len(synonyms) > 1:
-                expanded_terms.append("(" + " OR ".join(synonyms) + ")")
-            else:
-                expanded_terms.append(term)
 
-        query["query_string"]["query"] = " ".join(expanded_terms)
+        # Skip operators
+        query["query_string"]["query"] = expand_text(query_text, skip_operators=True)
 
     # Return modified request
     return request
@@ -10,6 +10,15 @@ Filters documents based on text similarity using Levenshtein distance.
 # @udf: tags=text,similarity,filter,string
 """
 
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # MicroPython builds ship without rapidfuzz
+    Levenshtein = None
+
+# Longest string the bit-parallel kernel handles; keeps every intermediate
+# within a signed 64-bit integer, which is all MicroPython guarantees
+BIT_PARALLEL_MAX_LEN = 62
+
 
 def udf_main() -> bool:
     """
@@ -27,51 +36,136 @@ def udf_main() -> bool:
     query_text = get_param_string("query")
     threshold = get_param_i64("threshold")
 
-    # Calculate Levenshtein distance
-    distance = levenshtein_distance(title, query_text)
+    # Calculate Levenshtein distance, stopping once it exceeds the threshold
+    distance = levenshtein_distance(title, query_text, threshold)
 
     # Return True if similar enough
     return distance <= threshold
 
 
-def levenshtein_distance(s1: str, s2: str) -> int:
+def levenshtein_distance(s1: str, s2: str, max_distance: int = None) -> int:
     """
     Calculate the Levenshtein (edit) distance between two strings.
 
+    Uses rapidfuzz's bit-parallel C++ implementation when it is installed
+    (CPython only; the WASM runtime always takes the pure-Python path).
+
     Args:
         s1: First string
         s2: Second string
+        max_distance: Optional cutoff; once the distance is known to exceed
+            it, computation stops and max_distance + 1 is returned
 
     Returns:
         int: The minimum number of single-character edits required
     """
+    if Levenshtein is not None:
+        return Levenshtein.distance(s1, s2, score_cutoff=max_distance)
+
     # Ensure s1 is the shorter string
     if len(s1) > len(s2):
         s1, s2 = s2, s1
 
+    # The length difference alone is a lower bound on the distance
+    if max_distance is not None and len(s2) - len(s1) > max_distance:
+        return max_distance + 1
+
     # Handle empty strings
     if len(s1) == 0:
         return len(s2)
     if len(s2) == 0:
         return len(s1)
 
-    # Create distance matrix
+    if len(s1) <= BIT_PARALLEL_MAX_LEN:
+        return _levenshtein_bit_parallel(s1, s2, max_distance)
+
+    # Two preallocated rows of the distance matrix, swapped after each
+    # pass instead of building a fresh list per row
     previous_row = list(range(len(s2) + 1))
+    current_row = [0] * (len(s2) + 1)
 
     for i, c1 in enumerate(s1):
-        current_row = [i + 1]
+        current_row[0] = i + 1
         for j, c2 in enumerate(s2):
             # Calculate costs
             insertions = previous_row[j + 1] + 1
             deletions = current_row[j] + 1
             substitutions = previous_row[j] + (0 if c1 == c2 else 1)
 
-            # Take minimum
-            current_row.append(min(insertions, deletions, substitutions))
+            # Take minimum, inlined to avoid a min() call per cell
+            best = substitutions
+            if insertions < best:
+                best = insertions
+            if deletions < best:
+                best = deletions
+            current_row[j + 1] = best
+
+        previous_row, current_row = current_row, previous_row
+
+        # Row minimums never decrease, so no later row can get back under
+        if max_distance is not None and min(previous_row) > max_distance:
+            return max_distance + 1
+
+    distance = previous_row[-1]
+    if max_distance is not None and distance > max_distance:
+        return max_distance + 1
 
-        previous_row = current_row
+    return distance
 
-    return previous_row[-1]
+
+def _levenshtein_bit_parallel(s1: str, s2: str, max_distance: int = None) -> int:
+    """
+    Levenshtein distance using Hyyrö's bit-parallel algorithm.
+
+    Each column of the distance matrix is encoded as vertical +1/-1 delta
+    bit vectors (VP/VN) over s1, so one pass over s2 updates a whole
+    column with a handful of integer operations.
+
+    Args:
+        s1: Shorter, non-empty string of at most BIT_PARALLEL_MAX_LEN chars
+        s2: Longer string
+        max_distance: Optional cutoff, as in levenshtein_distance
+
+    Returns:
+        int: The minimum number of single-character edits required
+    """
+    # Bitmask of positions in s1 where each character occurs
+    peq = {}
+    for i, c in enumerate(s1):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    m = len(s1)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    vp = mask
+    vn = 0
+    distance = m
+    remaining = len(s2)
+
+    for c in s2:
+        eq = peq.get(c, 0)
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        hp = vn | ~(xh | vp)
+        hn = vp & xh
+
+        # The last row of the column tracks the distance to this prefix of s2
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+
+        # Each remaining character can lower the distance by at most one
+        remaining -= 1
+        if max_distance is not None and distance - remaining > max_distance:
+            return max_distance + 1
+
+        hp = (hp << 1) | 1
+        hn = hn << 1
+        vp = (hn | ~(xv | hp)) & mask
+        vn = hp & xv & mask
+
+    return distance
 
 
 # Host function declarations (implemented by WASM runtime)